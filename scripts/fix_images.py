@@ -2,7 +2,8 @@ import os
 import re
 import requests
 from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
 import json
 import argparse
 import glob
@@ -17,6 +18,9 @@ try:
 except ImportError:
     print("dotenv 模块未安装，将直接使用环境变量")
 
+# 预编译的XPath：一次遍历同时查找 og:image 和 twitter:image meta 标签
+_META_XPATH = etree.XPath('//meta[@property="og:image" or @name="twitter:image"][@content]')
+
 def get_producthunt_token():
     """获取 Product Hunt 访问令牌"""
     # 优先使用 PRODUCTHUNT_DEVELOPER_TOKEN 环境变量
@@ -145,15 +149,14 @@ def fetch_og_image_url(url, retry_count=0, max_retries=3):
                 return None
         
         if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            # 查找 og:image meta 标签
-            og_image = soup.find("meta", property="og:image")
-            if og_image and og_image.get("content"):
-                return og_image["content"]
-            # 备用: 查找 twitter:image meta 标签
-            twitter_image = soup.find("meta", name="twitter:image") 
-            if twitter_image and twitter_image.get("content"):
-                return twitter_image["content"]
+            metas = _META_XPATH(lxml.html.fromstring(response.content))
+            # 优先使用 og:image，备用 twitter:image
+            for meta in metas:
+                if meta.get("property") == "og:image" and meta.get("content"):
+                    return meta.get("content")
+            for meta in metas:
+                if meta.get("content"):
+                    return meta.get("content")
         return None
     except Exception as e:
         print(f"获取 OG 图片 URL 时出错: {url}, 错误: {e}")
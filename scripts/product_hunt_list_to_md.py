@@ -1,4 +1,6 @@
 import os
+import re
+import html
 try:
     from dotenv import load_dotenv
     # 加载 .env 文件
@@ -9,14 +11,80 @@ except ImportError:
 
 import requests
 from datetime import datetime, timedelta, timezone
-from bs4 import BeautifulSoup
-import pytz
+import lxml.html
+from lxml import etree
+from zoneinfo import ZoneInfo
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-import json
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+
+# 共享的HTTP会话：复用连接（keep-alive），避免每个请求重复TCP+TLS握手
+_retry_strategy = Retry(
+    total=3,  # 最多重试3次
+    backoff_factor=1,  # 重试间隔时间
+    status_forcelist=[429, 500, 502, 503, 504]  # 需要重试的HTTP状态码
+)
+_adapter = HTTPAdapter(max_retries=_retry_strategy, pool_connections=10, pool_maxsize=30)
+_SESSION = requests.Session()
+_SESSION.mount("https://", _adapter)
+_SESSION.mount("http://", _adapter)
+
+# Product Hunt 访问令牌：优先使用环境变量，否则使用内置token
+_PRODUCTHUNT_TOKEN = os.getenv('PRODUCTHUNT_DEVELOPER_TOKEN') or "pfL-2mZeM7TWpumhKEfPwiQTeRp-SWuOZxNLMcZ3k28"
+
+# Webhook请求头只构建一次
+_WEBHOOK_HEADERS = {"Content-Type": "application/json", "User-Agent": "DecohackBot/1.0"}
+
+# 时区对象只创建一次，供所有产品复用
+_UTC = timezone.utc
+_BEIJING = ZoneInfo("Asia/Shanghai")
+# 北京时间输出格式（%p 需要 strftime 处理，无法用 str.format 代替）
+_BEIJING_TIME_FORMAT = '%Y年%m月%d日 %p%I:%M (北京时间)'
+
+# og:image 快速匹配：无需构建DOM，直接在<head>字节上查找
+# 必须匹配到结束引号，避免流式读取时在分块边界处返回被截断的URL
+_OG_RE = re.compile(rb'<meta[^>]+property=["\']og:image["\'][^>]+content=["\']([^"\']+)["\']', re.I)
+_HEAD_END_RE = re.compile(rb'</head\s*>', re.I)
+# 正则未命中时的解析器回退：一次遍历同时查找 og:image 和 twitter:image
+_META_XPATH = etree.XPath('//meta[@property="og:image" or @name="twitter:image"][@content]')
+
+# 关键词分隔符：逗号、&、|、-
+_KW_SPLIT = re.compile(r'[,&|\-]')
+
+# GraphQL查询模板在导入时构建一次，调用时只需填入日期
+_QUERY_TEMPLATE = """
+{
+  posts(order: VOTES, postedAfter: "%sT00:00:00Z", postedBefore: "%sT23:59:59Z", first: 30) {
+    nodes {
+      id
+      name
+      tagline
+      description
+      votesCount
+      createdAt
+      featuredAt
+      website
+      url
+      media {
+        url
+        type
+        videoUrl
+      }
+      thumbnail {
+        url
+        type
+        videoUrl
+      }
+    }
+  }
+}
+"""
 
 class Product:
-    def __init__(self, id: str, name: str, tagline: str, description: str, votesCount: int, createdAt: str, featuredAt: str, website: str, url: str, media=None, **kwargs):
+    __slots__ = ('name', 'tagline', 'description', 'votes_count', 'created_at', 'featured', 'website', 'url', 'og_image_url', 'keyword')
+
+    def __init__(self, id: str, name: str, tagline: str, description: str, votesCount: int, createdAt: str, featuredAt: str, website: str, url: str, media=None, thumbnail=None, **kwargs):
         self.name = name
         self.tagline = tagline
         self.description = description
@@ -25,11 +93,11 @@ class Product:
         self.featured = "是" if featuredAt else "否"
         self.website = website
         self.url = url
-        self.og_image_url = self.get_image_url_from_media(media)
+        self.og_image_url = self.get_image_url_from_media(media, thumbnail)
         self.keyword = self.generate_keywords()
 
-    def get_image_url_from_media(self, media):
-        """从API返回的media字段中获取图片URL"""
+    def get_image_url_from_media(self, media, thumbnail=None):
+        """从API返回的media字段（其次是thumbnail字段）中获取图片URL"""
         try:
             if media and isinstance(media, list) and len(media) > 0:
                 # 优先使用第一张图片
@@ -37,36 +105,56 @@ class Product:
                 if image_url:
                     print(f"成功从API获取图片URL: {self.name}")
                     return image_url
+
+            # 其次使用缩略图
+            if thumbnail and isinstance(thumbnail, dict):
+                image_url = thumbnail.get('url', '')
+                if image_url:
+                    print(f"成功从API缩略图获取图片URL: {self.name}")
+                    return image_url
             
-            # 如果API没有返回图片，尝试使用备用方法
-            print(f"API未返回图片，尝试使用备用方法: {self.name}")
-            backup_url = self.fetch_og_image_url()
-            if backup_url:
-                print(f"使用备用方法获取图片URL成功: {self.name}")
-                return backup_url
-            else:
-                print(f"无法获取图片URL: {self.name}")
-                
+            # 如果API没有返回图片，先留空，稍后由fill_missing_og_images并发使用备用方法
+            print(f"API未返回图片，稍后使用备用方法: {self.name}")
             return ""
         except Exception as e:
             print(f"获取图片URL时出错: {self.name}, 错误: {e}")
             return ""
 
+    def fetch_and_set_og_image(self):
+        """使用备用方法获取图片URL并写回og_image_url"""
+        backup_url = self.fetch_og_image_url()
+        if backup_url:
+            print(f"使用备用方法获取图片URL成功: {self.name}")
+            self.og_image_url = backup_url
+        else:
+            print(f"无法获取图片URL: {self.name}")
+
     def fetch_og_image_url(self) -> str:
         """获取产品的Open Graph图片URL（备用方法）"""
         try:
-            response = requests.get(self.url, timeout=10)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                # 查找og:image meta标签
-                og_image = soup.find("meta", property="og:image")
-                if og_image:
-                    return og_image["content"]
-                # 备用:查找twitter:image meta标签
-                twitter_image = soup.find("meta", name="twitter:image") 
-                if twitter_image:
-                    return twitter_image["content"]
-            return ""
+            # 流式读取页面，只解析<head>部分，读到</head>即停止，不下载和解析<body>
+            response = _SESSION.get(self.url, stream=True, timeout=10)
+            try:
+                if response.status_code != 200:
+                    return ""
+                head = b""
+                for chunk in response.iter_content(chunk_size=16384):
+                    head += chunk
+                    # 快速路径：正则直接匹配og:image
+                    match = _OG_RE.search(head)
+                    if match:
+                        return html.unescape(match.group(1).decode())
+                    if _HEAD_END_RE.search(head):
+                        break
+                # 正则未命中（如属性顺序不同或只有twitter:image），回退到解析<head>
+                metas = _META_XPATH(lxml.html.fromstring(head)) if head.strip() else []
+                for meta in metas:
+                    if meta.get('property') == 'og:image':
+                        return meta.get('content')
+                # 备用:twitter:image meta标签
+                return metas[0].get('content') if metas else ""
+            finally:
+                response.close()
         except Exception as e:
             print(f"获取OG图片URL时出错: {self.name}, 错误: {e}")
             return ""
@@ -75,18 +163,18 @@ class Product:
         """生成产品的关键词，显示在一行，用逗号分隔"""
         try:
             # 使用简单的关键词提取方法
-            words = set((self.name + ", " + self.tagline).replace("&", ",").replace("|", ",").replace("-", ",").split(","))
-            return ", ".join([word.strip() for word in words if word.strip()])
+            # 先strip再去重，dict保留首次出现的顺序
+            words = dict.fromkeys(word for word in map(str.strip, _KW_SPLIT.split(f"{self.name}, {self.tagline}")) if word)
+            return ", ".join(words)
         except Exception as e:
             print(f"关键词生成失败: {e}")
             return self.name  # 至少返回产品名称作为关键词
 
     def convert_to_beijing_time(self, utc_time_str: str) -> str:
         """将UTC时间转换为北京时间"""
-        utc_time = datetime.strptime(utc_time_str, '%Y-%m-%dT%H:%M:%SZ')
-        beijing_tz = pytz.timezone('Asia/Shanghai')
-        beijing_time = utc_time.replace(tzinfo=pytz.utc).astimezone(beijing_tz)
-        return beijing_time.strftime('%Y年%m月%d日 %p%I:%M (北京时间)')
+        utc_time = datetime.fromisoformat(utc_time_str.rstrip('Z'))
+        beijing_time = utc_time.replace(tzinfo=_UTC).astimezone(_BEIJING)
+        return beijing_time.strftime(_BEIJING_TIME_FORMAT)
 
     def to_dict(self) -> dict:
         """将产品数据转换为字典格式，用于发送到Webhook"""
@@ -103,27 +191,17 @@ class Product:
             "keyword": self.keyword
         }
 
-def get_producthunt_token():
-    """获取 Product Hunt 访问令牌"""
-    # 直接返回硬编码的token
-    return "pfL-2mZeM7TWpumhKEfPwiQTeRp-SWuOZxNLMcZ3k28"
-    # 优先使用环境变量
-    token = os.getenv('PRODUCTHUNT_DEVELOPER_TOKEN')
-    if token:
-        return token
-    
-    # 如果没有token，返回None，这样会使用模拟数据
-    print("未找到Product Hunt token，将使用模拟数据")
-    return None
+def fill_missing_og_images(products):
+    """为API未返回图片的产品并发获取OG图片（网络I/O密集，使用线程池）"""
+    pending = [product for product in products if not product.og_image_url and product.url]
+    if not pending:
+        return
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        list(executor.map(Product.fetch_and_set_og_image, pending))
 
-def fetch_product_hunt_data():
-    """从Product Hunt获取前一天的Top 30数据"""
-    token = get_producthunt_token()
-    if not token:
-        raise Exception("No Product Hunt token available")
-        
-    yesterday = datetime.now(timezone.utc) - timedelta(days=1)
-    date_str = yesterday.strftime('%Y-%m-%d')
+def fetch_product_hunt_data(date_str):
+    """从Product Hunt获取指定日期（通常为前一天）的Top 30数据"""
+    token = _PRODUCTHUNT_TOKEN
     url = "https://api.producthunt.com/v2/api/graphql"
     
     # 添加更多请求头信息
@@ -137,66 +215,22 @@ def fetch_product_hunt_data():
         "Connection": "keep-alive"
     }
 
-    # 设置重试策略
-    retry_strategy = Retry(
-        total=3,  # 最多重试3次
-        backoff_factor=1,  # 重试间隔时间
-        status_forcelist=[429, 500, 502, 503, 504]  # 需要重试的HTTP状态码
-    )
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    session = requests.Session()
-    session.mount("https://", adapter)
-
-    base_query = """
-    {
-      posts(order: VOTES, postedAfter: "%sT00:00:00Z", postedBefore: "%sT23:59:59Z", after: "%s") {
-        nodes {
-          id
-          name
-          tagline
-          description
-          votesCount
-          createdAt
-          featuredAt
-          website
-          url
-          media {
-            url
-            type
-            videoUrl
-          }
-        }
-        pageInfo {
-          hasNextPage
-          endCursor
-        }
-      }
-    }
-    """
-
-    all_posts = []
-    has_next_page = True
-    cursor = ""
+    # 一次请求直接获取按票数排序的前30个产品，无需分页
+    payload = {"query": _QUERY_TEMPLATE % (date_str, date_str)}
+    try:
+        response = _SESSION.post(url, headers=headers, json=payload)
+        response.raise_for_status()  # 抛出非200状态码的异常
 
-    while has_next_page and len(all_posts) < 30:
-        query = base_query % (date_str, date_str, cursor)
-        try:
-            response = session.post(url, headers=headers, json={"query": query})
-            response.raise_for_status()  # 抛出非200状态码的异常
-            
-            data = response.json()['data']['posts']
-            posts = data['nodes']
-            all_posts.extend(posts)
+        posts = orjson.loads(response.content)['data']['posts']['nodes']
 
-            has_next_page = data['pageInfo']['hasNextPage']
-            cursor = data['pageInfo']['endCursor']
-            
-        except requests.exceptions.RequestException as e:
-            print(f"请求失败: {e}")
-            raise Exception(f"Failed to fetch data from Product Hunt: {e}")
+    except requests.exceptions.RequestException as e:
+        print(f"请求失败: {e}")
+        raise Exception(f"Failed to fetch data from Product Hunt: {e}")
 
-    # 只保留前30个产品
-    return [Product(**post) for post in sorted(all_posts, key=lambda x: x['votesCount'], reverse=True)[:30]]
+    # API已按VOTES排序返回
+    products = [Product(**post) for post in posts]
+    fill_missing_og_images(products)
+    return products
 
 def fetch_mock_data():
     """生成模拟数据用于测试"""
@@ -251,17 +285,15 @@ def fetch_mock_data():
             "media": []
         }
     ]
-    return [Product(**product) for product in mock_products]
+    products = [Product(**product) for product in mock_products]
+    fill_missing_og_images(products)
+    return products
 
-def send_to_webhook(products):
+def send_to_webhook(products, date_today):
     """将产品数据发送到飞书Webhook"""
     # 更新为新的webhook URL
     webhook_url = os.getenv('FEISHU_WEBHOOK_URL', 'https://larkcommunity.feishu.cn/base/workflow/webhook/event/O7fjaz3CTw5lHOh5g0ccP70EnKf')
     
-    # 获取今天的日期
-    today = datetime.now(timezone.utc)
-    date_today = today.strftime('%Y-%m-%d')
-    
     # 构建要发送的JSON数据 - 包含更丰富的产品信息
     products_data = []
     for i, product in enumerate(products[:10]):  # 只发送前10个产品
@@ -282,8 +314,9 @@ def send_to_webhook(products):
         products_data.append(product_info)
     
     # 添加统计信息
-    total_votes = sum(product.votes_count for product in products[:10])
-    avg_votes = total_votes // len(products[:10]) if products else 0
+    votes = [product.votes_count for product in products[:10]]
+    total_votes = sum(votes)
+    avg_votes = total_votes // len(votes) if votes else 0
     
     data = {
         "日期": date_today,
@@ -291,18 +324,21 @@ def send_to_webhook(products):
         "产品总数": len(products_data),
         "总票数": total_votes,
         "平均票数": avg_votes,
-        "最高票数": products[0].votes_count if products else 0,
-        "最低票数": products[min(9, len(products)-1)].votes_count if products else 0,
+        "最高票数": votes[0] if votes else 0,
+        "最低票数": votes[-1] if votes else 0,
         "产品列表": products_data
     }
     
     print(f"准备发送数据到Webhook: {webhook_url}")
-    print(f"发送的JSON数据预览:")
-    print(json.dumps(data, ensure_ascii=False, indent=2)[:1500] + "..." if len(json.dumps(data, ensure_ascii=False)) > 1500 else json.dumps(data, ensure_ascii=False, indent=2))
+    # 仅在设置了DEBUG环境变量时打印预览，避免生产环境多做一次完整序列化
+    if os.getenv("DEBUG"):
+        print(f"发送的JSON数据预览:")
+        preview = orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+        print(preview[:1500] + "..." if len(preview) > 1500 else preview)
     
     # 发送JSON数据到webhook
     try:
-        response = requests.post(webhook_url, json=data, timeout=10)
+        response = _SESSION.post(webhook_url, data=orjson.dumps(data), headers=_WEBHOOK_HEADERS, timeout=10)
         response.raise_for_status()
         print(f"成功发送数据到Webhook: {response.status_code}")
         return True
@@ -313,15 +349,16 @@ def send_to_webhook(products):
 def main():
     print("开始运行Product Hunt数据获取程序...")
     
-    # 获取昨天的日期并格式化
-    yesterday = datetime.now(timezone.utc) - timedelta(days=1)
-    date_str = yesterday.strftime('%Y-%m-%d')
+    # 只取一次当前时间，今天和昨天的日期都由它推导，避免跨午夜时不一致
+    now = datetime.now(timezone.utc)
+    date_today = now.strftime('%Y-%m-%d')
+    date_str = (now - timedelta(days=1)).strftime('%Y-%m-%d')
     print(f"获取日期: {date_str}")
 
     try:
         # 尝试获取Product Hunt数据
         print("尝试从Product Hunt API获取数据...")
-        products = fetch_product_hunt_data()
+        products = fetch_product_hunt_data(date_str)
         print(f"成功获取到 {len(products)} 个产品")
     except Exception as e:
         print(f"获取Product Hunt数据失败: {e}")
@@ -340,7 +377,7 @@ def main():
 
     # 发送数据到Webhook
     print("发送数据到Webhook...")
-    success = send_to_webhook(products)
+    success = send_to_webhook(products, date_today)
     
     if success:
         print("程序执行完成！")
@@ -0,0 +1,62 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+import product_hunt_list_to_md as ph
+
+
+class FakeResponse:
+    """按给定分块返回内容的流式响应"""
+
+    def __init__(self, chunks, status_code=200):
+        self.chunks = chunks
+        self.status_code = status_code
+
+    def iter_content(self, chunk_size=None):
+        return iter(self.chunks)
+
+    def close(self):
+        pass
+
+
+def make_product():
+    return ph.Product(
+        id="1",
+        name="Test",
+        tagline="tagline",
+        description="",
+        votesCount=1,
+        createdAt="2025-03-07T16:01:00Z",
+        featuredAt=None,
+        website="",
+        url="https://www.producthunt.com/posts/test",
+        media=[{"url": "https://example.com/media.png"}],
+    )
+
+
+class FetchOgImageUrlTest(unittest.TestCase):
+    def fetch(self, chunks):
+        with mock.patch.object(ph._SESSION, "get", return_value=FakeResponse(chunks)):
+            return make_product().fetch_og_image_url()
+
+    def test_content_split_across_chunks(self):
+        chunks = [
+            b'<html><head><meta property="og:image" content="https://x/abc',
+            b'def.png"></head><body>',
+        ]
+        self.assertEqual(self.fetch(chunks), "https://x/abcdef.png")
+
+    def test_unescapes_entities(self):
+        chunks = [b'<html><head><meta property="og:image" content="https://x/a.png?w=1&amp;h=2"></head>']
+        self.assertEqual(self.fetch(chunks), "https://x/a.png?w=1&h=2")
+
+    def test_falls_back_to_twitter_image(self):
+        chunks = [b'<html><head><meta name="twitter:image" content="https://x/t.png"></head><body>']
+        self.assertEqual(self.fetch(chunks), "https://x/t.png")
+
+
+if __name__ == "__main__":
+    unittest.main()